@@ -1,11 +1,23 @@
 #!/usr/bin/env python3
 
 import argparse
+import codecs
+import fnmatch
+import functools
+import hashlib
+import itertools
+import json
 import logging
 import os
-from typing import Any, Dict, List, Optional, Set
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from typing import Any, BinaryIO, Dict, FrozenSet, Iterable, Iterator, List, Optional, Pattern, Tuple, Union
 
 import pathspec
+from pathspec.patterns import GitWildMatchPattern
 from tqdm import tqdm
 
 # Import TOML library with fallback for older Python versions
@@ -17,11 +29,35 @@ except ImportError:
     except ImportError:
         tomllib = None
 
+# Optional RE2 backend for the ignore/allow matchers (pip install google-re2)
+try:
+    import re2
+except ImportError:
+    re2 = None
+
 # --- Default Configuration ---
 CONFIG_FILENAME = "pyproject.toml"
+MATCHER_ENV_VAR = "LLMCTX_MATCHER"  # Set to 're2' to match ignore/allow patterns with RE2
+
+# --- Discovery Cache ---
+CACHE_VERSION = 4  # Bump when the cache format or the discovery rules change
+CACHE_RACY_WINDOW_NS = 2 * 10 ** 9  # Directories modified this close to a scan are not trusted (coarse mtimes)
+
+# --- Output Settings ---
+OUTPUT_BUFFER_SIZE = 4 * 1024 * 1024  # Flush the output buffer every 4 MB
+BINARY_SNIFF_SIZE = 8192  # Leading bytes checked for NUL bytes / invalid UTF-8 before reading the rest
+DEFAULT_MAX_FILE_SIZE = 1024 * 1024  # Larger files are skipped unless --max-file-size says otherwise
+STREAM_THRESHOLD = 64 * 1024  # Files larger than this are copied straight into the output file
+COPY_CHUNK_SIZE = 16 * 1024 * 1024  # Max bytes per copy_file_range()/sendfile() call
+FILE_HEADER_PREFIX = b"## File: `"
+FILE_HEADER_SUFFIX = b"`\n\n"
+FILE_FOOTER = b"\n```\n\n---\n\n"
+TRUNCATED_MARKER = b"\n[... truncated: the rest of this file could not be read ...]"
+SORT_ORDERS = ('none', 'path', 'inode')
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # Reads are I/O-bound, so oversubscribe the CPUs
 
 # --- IGNORED LISTS (Defaults) ---
-DEFAULT_IGNORED_DIRS: Set[str] = {
+DEFAULT_IGNORED_DIRS: FrozenSet[str] = frozenset({
     # VCS / IDE / Env
     '.git', '.github', '.vscode', '.idea', 'node_modules', '__pycache__', 'venv',
     # Common Python/Tooling envs
@@ -32,9 +68,9 @@ DEFAULT_IGNORED_DIRS: Set[str] = {
     '__MACOSX', '*.egg-info', 'site-packages', 'docs_build', 'builddocs',
     # Other common package manager dirs
     'bower_components', 'jspm_packages',
-}
+})
 
-DEFAULT_IGNORED_FILES: Set[str] = {
+DEFAULT_IGNORED_FILES: FrozenSet[str] = frozenset({
     # Env files (these often contain secrets)
     '.env', '.env.local', '.env.production', '.env.development', '.env.test', '.env.*',
     # Lock files (not source code)
@@ -46,46 +82,46 @@ DEFAULT_IGNORED_FILES: Set[str] = {
     'thumbs.db',
     # CI/CD config files (can be noisy)
     '.travis.yml', 'circle.yml', 'appveyor.yml', 'Jenkinsfile',
-}
+})
 
-DEFAULT_IGNORED_EXTENSIONS: Set[str] = {
+DEFAULT_IGNORED_EXTENSIONS: FrozenSet[str] = frozenset({
     # --- Media: Images ---
     '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.webp', '.bmp', '.tiff', '.psd',
     # --- Media: Video & Audio ---
-    '.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', 'wmv',
-    '.mp3', '.wav', '.ogg', '.flac', '.m4a', 'aac',
+    '.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.wmv',
+    '.mp3', '.wav', '.ogg', '.flac', '.m4a', '.aac',
     # --- Fonts ---
     '.woff', '.woff2', '.ttf', '.otf', '.eot',
     # --- Archives & Documents ---
-    '.zip', '.rar', '.tar', '.gz', '.7z', '.bz2', 'tgz',
+    '.zip', '.rar', '.tar', '.gz', '.7z', '.bz2', '.tgz',
     '.pdf', '.docx', '.xlsx', '.pptx', '.epub', '.mobi', '.csv', '.xls', '.doc', '.ppt',
     # --- Python compiled/cache files ---
     '.pyc', '.pyo', '.pyd', '.o', '.so', '.a',
     # --- Logs / DBs / System ---
-    '.log', '.lock', '.db', '.sqlite3', '.sqlitedb', '.dump', 'bak', '.tmp', '.dat',
+    '.log', '.lock', '.db', '.sqlite3', '.sqlitedb', '.dump', '.bak', '.tmp', '.dat',
     # --- OS & System Files ---
     '.DS_Store',
     # --- Compiled code from other languages ---
     '.class',  # Java
     '.dll', '.exe', '.lib',  # Windows/C++
     '.bin', '.iso', '.out', '.elf',  # Linux/Binary
-    '.obj', '.o',  # Object files
+    '.obj',  # Object files
     '.jar',  # Java Archive
     '.wasm',  # WebAssembly
     # --- Secrets / Keys (Crucial to ignore) ---
-    '.key', '.pem', '.crt', '.cer', '.p12', '.pfx', '.jks', '.p7b', 'gpg',
+    '.key', '.pem', '.crt', '.cer', '.p12', '.pfx', '.jks', '.p7b', '.gpg',
     # --- Config / Docs / Scripts (from your original list) ---
     '.gitignore', '.gitattributes', '.dockerignore', '.gitkeep',
     '.md', '.markdown', '.rst',  # Documentation
     '.sh', '.bat', '.ps1', '.cmd',  # Shell scripts
     # --- Common Config Files (can be noisy) ---
     '.xml', '.json', '.yaml', '.yml', '.toml', '.ini',
-}
+})
 
 # --- ALLOWED LISTS (Defaults) ---
-DEFAULT_ALLOWED_DIRS: Set[str] = set()
-DEFAULT_ALLOWED_FILES: Set[str] = set()
-DEFAULT_ALLOWED_EXTENSIONS: Set[str] = set()
+DEFAULT_ALLOWED_DIRS: FrozenSet[str] = frozenset()
+DEFAULT_ALLOWED_FILES: FrozenSet[str] = frozenset()
+DEFAULT_ALLOWED_EXTENSIONS: FrozenSet[str] = frozenset()
 
 
 def setup_logging():
@@ -113,6 +149,46 @@ def setup_arg_parser() -> argparse.ArgumentParser:
         default=None,
         help="Path to the output file. Defaults to '[project_name]_context.md'."
     )
+    parser.add_argument(
+        "--sort",
+        choices=SORT_ORDERS,
+        default="none",
+        help="Order of files in the output:\n"
+             "  none  - directory scan order (default)\n"
+             "  path  - alphabetical by relative path\n"
+             "  inode - by inode number, for more sequential disk reads on cold caches"
+    )
+    parser.add_argument(
+        "--max-file-size",
+        type=int,
+        default=DEFAULT_MAX_FILE_SIZE,
+        metavar="BYTES",
+        help=f"Skip files larger than this many bytes. Use 0 for no limit. Defaults to {DEFAULT_MAX_FILE_SIZE}."
+    )
+    parser.add_argument(
+        "--follow-symlinks",
+        dest="follow_symlinks",
+        action="store_true",
+        help="Follow symlinked files and directories."
+    )
+    parser.add_argument(
+        "--no-follow-symlinks",
+        dest="follow_symlinks",
+        action="store_false",
+        help="Skip symlinks entirely (default)."
+    )
+    parser.set_defaults(follow_symlinks=False)
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always rescan the project instead of reusing the cached file list from a previous run."
+    )
+    parser.add_argument(
+        "--cache-path",
+        type=str,
+        default=None,
+        help="Path to the discovery cache file. Defaults to a per-project file in the user cache directory."
+    )
     return parser
 
 
@@ -124,12 +200,12 @@ def load_config(root_path: str) -> Dict[str, Any]:
     """
 
     config = {
-        "allowed_dirs": DEFAULT_ALLOWED_DIRS.copy(),
-        "allowed_files": DEFAULT_ALLOWED_FILES.copy(),
-        "allowed_extensions": DEFAULT_ALLOWED_EXTENSIONS.copy(),
-        "ignored_dirs": DEFAULT_IGNORED_DIRS.copy(),
-        "ignored_files": DEFAULT_IGNORED_FILES.copy(),
-        "ignored_extensions": DEFAULT_IGNORED_EXTENSIONS.copy(),
+        "allowed_dirs": DEFAULT_ALLOWED_DIRS,
+        "allowed_files": DEFAULT_ALLOWED_FILES,
+        "allowed_extensions": DEFAULT_ALLOWED_EXTENSIONS,
+        "ignored_dirs": DEFAULT_IGNORED_DIRS,
+        "ignored_files": DEFAULT_IGNORED_FILES,
+        "ignored_extensions": DEFAULT_IGNORED_EXTENSIONS,
     }
     config_path = os.path.join(root_path, CONFIG_FILENAME)
 
@@ -145,14 +221,14 @@ def load_config(root_path: str) -> Dict[str, Any]:
                 logging.info("Found [tool.llmcontext] section. Applying custom config.")
 
                 # 'Allowed' lists *replace* the defaults
-                config["allowed_dirs"] = set(user_config.get("allowed_dirs", DEFAULT_ALLOWED_DIRS))
-                config["allowed_files"] = set(user_config.get("allowed_files", DEFAULT_ALLOWED_FILES))
-                config["allowed_extensions"] = set(user_config.get("allowed_extensions", DEFAULT_ALLOWED_EXTENSIONS))
+                config["allowed_dirs"] = frozenset(user_config.get("allowed_dirs", DEFAULT_ALLOWED_DIRS))
+                config["allowed_files"] = frozenset(user_config.get("allowed_files", DEFAULT_ALLOWED_FILES))
+                config["allowed_extensions"] = frozenset(user_config.get("allowed_extensions", DEFAULT_ALLOWED_EXTENSIONS))
 
                 # 'Ignored' lists *add to* the defaults
-                config["ignored_dirs"].update(user_config.get("ignored_dirs", []))
-                config["ignored_files"].update(user_config.get("ignored_files", []))
-                config["ignored_extensions"].update(user_config.get("ignored_extensions", []))
+                config["ignored_dirs"] = DEFAULT_IGNORED_DIRS.union(user_config.get("ignored_dirs", []))
+                config["ignored_files"] = DEFAULT_IGNORED_FILES.union(user_config.get("ignored_files", []))
+                config["ignored_extensions"] = DEFAULT_IGNORED_EXTENSIONS.union(user_config.get("ignored_extensions", []))
             else:
                 logging.info(f"No [tool.llmcontext] section found in {CONFIG_FILENAME}. Using defaults.")
         except Exception as e:
@@ -162,99 +238,480 @@ def load_config(root_path: str) -> Dict[str, Any]:
             logging.warning("TOML library not found. Skipping pyproject.toml. Install with 'pip install tomli' for Python < 3.11")
         else:
             logging.info(f"No {CONFIG_FILENAME} found. Using default ignore lists.")
+
+    # Normalize extensions to lowercase, dot-prefixed keys for case-insensitive matching
+    config["allowed_extensions"] = normalize_extensions(config["allowed_extensions"])
+    config["ignored_extensions"] = normalize_extensions(config["ignored_extensions"])
+
+    config["gitignore_lines"] = load_gitignore_lines(root_path)
+    config["ignore_spec"], config["allow_spec"] = build_specs(config, config["gitignore_lines"])
+    config["allowed_dirs_pattern"] = build_allowed_dirs_pattern(config["allowed_dirs"])
+    config["ignored_names_pattern"], config["ignored_paths_pattern"] = build_ignored_files_patterns(config["ignored_files"])
     return config
 
 
-def load_gitignore_spec(root_path: str) -> Optional[pathspec.PathSpec]:
+def normalize_extensions(extensions: Iterable[str]) -> FrozenSet[str]:
+    """Normalizes extensions to lowercase and dot-prefixed (e.g. 'PNG' -> '.png')."""
+    return frozenset('.' + ext.lstrip('.').lower() for ext in extensions if ext.lstrip('.'))
+
+
+def get_extension(filename: str) -> str:
+    """
+    Returns the lowercase extension of a filename, including the dot.
+    Unlike os.path.splitext, dotfiles keep their name as extension (e.g. '.gitignore').
+    """
+    dot = filename.rfind('.')
+    return filename[dot:].lower() if dot != -1 else ''
+
+
+def load_gitignore_lines(root_path: str) -> List[str]:
     """Loads .gitignore rules from the root directory if it exists."""
     gitignore_path = os.path.join(root_path, '.gitignore')
     if os.path.isfile(gitignore_path):
         logging.info("Loading .gitignore rules.")
         with open(gitignore_path, 'r', encoding='utf-8') as f:
-            return pathspec.PathSpec.from_lines('gitwildmatch', f)
-    return None
+            return f.read().splitlines()
+    return []
+
+
+class Re2PathSpec:
+    """
+    Matches paths against gitwildmatch patterns with a single RE2 automaton,
+    instead of pathspec's one-regex-per-pattern loop. Provides PathSpec.match_file().
+
+    Only valid for pattern lists without negations ('!pattern'), since an alternation
+    cannot express gitignore's "last matching pattern wins" rule.
+    """
+
+    def __init__(self, regexes: List[str]):
+        self.regex = re2.compile('|'.join(f"(?:{r})" for r in regexes))
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> Optional["Re2PathSpec"]:
+        """Builds a matcher from gitwildmatch lines, or returns None if any line is a negation."""
+        regexes = []
+        for line in lines:
+            regex, include = GitWildMatchPattern.pattern_to_regex(line)
+            if include is None:
+                continue  # Blank line or comment
+            if not include:
+                return None
+            # RE2 rejects the duplicate group names pathspec uses, and they are not needed here
+            regexes.append(regex.replace('(?P<ps_d>', '(?:'))
+        return cls(regexes)
+
+    def match_file(self, file: str) -> bool:
+        return self.regex.match(file) is not None
+
 
+PathMatcher = Union[pathspec.PathSpec, Re2PathSpec]
 
-def discover_files(root_path: str, config: Dict[str, Any], spec: Optional[pathspec.PathSpec]) -> List[str]:
+
+def compile_path_matcher(lines: List[str], use_re2: bool) -> PathMatcher:
+    """Compiles gitwildmatch lines with RE2 when requested and possible, otherwise with pathspec."""
+    if use_re2:
+        try:
+            matcher = Re2PathSpec.from_lines(lines)
+        except re2.error as e:
+            logging.warning(f"Could not compile patterns with RE2, using pathspec instead: {e}")
+        else:
+            if matcher:
+                return matcher
+            logging.info("Negated ('!') patterns are not supported by the RE2 matcher, using pathspec instead.")
+    return pathspec.PathSpec.from_lines('gitwildmatch', lines)
+
+
+def build_specs(config: Dict[str, Any], gitignore_lines: List[str]) -> Tuple[PathMatcher, Optional[PathMatcher]]:
+    """
+    Compiles the ignore and allow lists into gitwildmatch PathSpecs, so each path is matched once.
+    If the LLMCTX_MATCHER environment variable is 're2' and google-re2 is installed,
+    each list is compiled into a single RE2 automaton instead.
+
+    - The ignore spec fuses .gitignore and 'ignored_dirs'. The config list comes last,
+      so it always wins: a '!pattern' line in .gitignore cannot re-include it.
+    - The allow spec holds 'allowed_files' (exact relative paths) and is None when it is empty.
+
+    Extensions are not part of the specs; they are matched case-insensitively against
+    the normalized extension sets instead. 'ignored_files' must only match files, so it
+    is compiled separately (see build_ignored_files_patterns).
+    """
+    ignore_lines = list(gitignore_lines)
+    ignore_lines += [f"{d.replace(os.path.sep, '/').strip('/')}/" for d in config["ignored_dirs"]]
+
+    allow_lines = [f"/{f.replace(os.path.sep, '/').lstrip('/')}" for f in config["allowed_files"]]
+
+    use_re2 = os.environ.get(MATCHER_ENV_VAR, '').lower() == 're2'
+    if use_re2 and re2 is None:
+        logging.warning(f"{MATCHER_ENV_VAR}=re2 is set but google-re2 is not installed. Install with 'pip install google-re2'.")
+        use_re2 = False
+
+    ignore_spec = compile_path_matcher(ignore_lines, use_re2)
+    allow_spec = compile_path_matcher(allow_lines, use_re2) if allow_lines else None
+    return ignore_spec, allow_spec
+
+
+def build_ignored_files_patterns(ignored_files: Iterable[str]) -> Tuple[Optional[Pattern[str]], Optional[Pattern[str]]]:
+    """
+    Compiles 'ignored_files' into a (name_pattern, path_pattern) pair of regexes, either may be None.
+    Entries without a '/' match a file's name in any directory; entries with one match its
+    full relative path. Glob characters use fnmatch syntax (e.g. '.env.*').
+    Unlike gitignore patterns, these never match directories or their contents.
+    """
+    names, paths = [], []
+    for f in ignored_files:
+        f = f.replace(os.path.sep, '/').strip('/')
+        if f:
+            (paths if '/' in f else names).append(fnmatch.translate(f))
+    name_pattern = re.compile('|'.join(names)) if names else None
+    path_pattern = re.compile('|'.join(paths)) if paths else None
+    return name_pattern, path_pattern
+
+
+def build_allowed_dirs_pattern(allowed_dirs: Iterable[str]) -> Optional[Pattern[str]]:
+    """
+    Compiles 'allowed_dirs' into one regex matching relative paths inside any of them,
+    or returns None when no directories are allowed explicitly.
+    """
+    # Ensure allowed_dirs are in POSIX format for consistent matching
+    allowed_paths = [p.replace(os.path.sep, '/').strip('/') for p in allowed_dirs]
+    allowed_paths = [p for p in allowed_paths if p]
+    if not allowed_paths:
+        return None
+    return re.compile('(?:' + '|'.join(map(re.escape, allowed_paths)) + ')(?:/|$)')
+
+
+def discover_files(root_path: str, config: Dict[str, Any], sort_by: str = "none",
+                   max_file_size: int = DEFAULT_MAX_FILE_SIZE, follow_symlinks: bool = False,
+                   exclude_path: Optional[str] = None,
+                   snapshot: Optional[Dict[str, list]] = None) -> Iterator[Tuple[str, str, str]]:
     """
     Discovers all files to be processed, applying priority filtering.
 
+    Yields (full_path, relative_path, lang) tuples, with relative paths in POSIX format,
+    ordered according to 'sort_by' (one of SORT_ORDERS). 'lang' is the code fence language tag.
+    In scan order ('none') files are yielded as soon as they are found; sorting requires
+    the whole walk to finish first.
+
+    Only regular files are considered; symlinks are skipped unless 'follow_symlinks' is set.
+    The file at 'exclude_path' (the output file) is never yielded, even if it is created mid-scan.
+
+    If 'snapshot' is given, its "dirs" and "sizes" lists are filled with the directory mtimes
+    and checked file sizes needed to validate a cached result later (see load_discovery_cache).
+
     The filter priority is:
-    1. (Priority) Include if in 'allowed_files' or 'allowed_extensions'.
+    1. (Priority) Include if in 'allowed_extensions' or matched by the allow spec ('allowed_files').
     2. Exclude if not in 'allowed_dirs' (if 'allowed_dirs' is set).
-    3. Exclude if in 'ignored_dirs', 'ignored_files', or 'ignored_extensions'.
-    4. Exclude if matched by .gitignore ('spec').
+    3. Exclude if in 'ignored_extensions', matched by 'ignored_files', or matched by the
+       ignore spec ('ignored_dirs' and .gitignore).
+    4. Exclude if larger than 'max_file_size' (0 disables the limit), even if force-allowed.
     5. Include if not excluded by any above rule.
     """
-    files_to_process = []
+    files_to_process = []  # Only collected when sorting
 
-    allowed_dirs = config["allowed_dirs"]
-    allowed_files = config["allowed_files"]
+    allowed_dirs_pattern = config["allowed_dirs_pattern"]
+    ignored_names_pattern = config["ignored_names_pattern"]
+    ignored_paths_pattern = config["ignored_paths_pattern"]
     allowed_extensions = config["allowed_extensions"]
-    ignored_dirs = config["ignored_dirs"]
-    ignored_files = config["ignored_files"]
     ignored_extensions = config["ignored_extensions"]
+    ignore_spec = config["ignore_spec"]
+    allow_spec = config["allow_spec"]
+
+    # (st_dev, st_ino) of scanned directories, to avoid symlink cycles when following symlinks
+    visited_dirs = set()
+    if follow_symlinks:
+        root_stat = os.stat(root_path)
+        visited_dirs.add((root_stat.st_dev, root_stat.st_ino))
+
+    def _scan(dirpath: str, rel_prefix: str) -> Iterator[Tuple[os.DirEntry, str]]:
+        """Walks 'dirpath' with os.scandir, reusing the cached DirEntry type info."""
+        subdirs = []
+        try:
+            if snapshot is not None:
+                snapshot["dirs"].append((dirpath, os.stat(dirpath).st_mtime_ns))
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    relative_path = rel_prefix + entry.name
+
+                    # --- Directory Filtering ---
+                    if entry.is_dir(follow_symlinks=follow_symlinks):
+                        # Trailing slash for directories to match .gitignore behavior
+                        if ignore_spec.match_file(relative_path + '/'):
+                            continue
+                        if follow_symlinks:
+                            dir_stat = entry.stat()
+                            dir_key = (dir_stat.st_dev, dir_stat.st_ino)
+                            if dir_key in visited_dirs:
+                                continue
+                            visited_dirs.add(dir_key)
+                        subdirs.append(entry)
+                    # Pipes, sockets and devices are never regular files, so they are skipped here
+                    elif entry.is_file(follow_symlinks=follow_symlinks):
+                        yield entry, relative_path
+        except OSError as e:
+            logging.warning(f"Could not scan directory {dirpath}: {e}")
+            return
 
-    # Ensure allowed_dirs are in POSIX format for consistent matching
-    allowed_paths = [p.replace(os.path.sep, '/') for p in allowed_dirs]
-
-    for dirpath, dirnames, filenames in os.walk(root_path, topdown=True):
-
-        # --- Directory Filtering ---
-        dirs_to_remove = set()
-        for d in dirnames:
-            # Check config 'ignored_dirs' (by name or relative path)
-            relative_dir_path = os.path.relpath(os.path.join(dirpath, d), root_path).replace(os.path.sep, '/')
-            if d in ignored_dirs or relative_dir_path in ignored_dirs:
-                dirs_to_remove.add(d)
-
-        # Check .gitignore
-        if spec:
-            for d in dirnames:
-                if d in dirs_to_remove: continue
-                relative_dir_path = os.path.relpath(os.path.join(dirpath, d), root_path).replace(os.path.sep, '/')
-                # Add a trailing slash for directories to match .gitignore behavior
-                if spec.match_file(relative_dir_path + '/'):
-                    dirs_to_remove.add(d)
-
-        dirnames[:] = [d for d in dirnames if d not in dirs_to_remove]
-
-        # --- File Filtering (with Priority Logic) ---
-        for filename in filenames:
-            full_path = os.path.join(dirpath, filename)
-            relative_path = os.path.relpath(full_path, root_path).replace(os.path.sep, '/')
-            _, extension = os.path.splitext(filename)  # Use filename for extension
-
-            # --- 1. Priority 'Allow' Check (Overrides all ignores) ---
-            is_force_allowed = relative_path in allowed_files or \
-                               (extension and extension in allowed_extensions)
-
-            if is_force_allowed:
-                files_to_process.append(full_path)
-                continue  # Skip all other ignore checks
+        # Descend after the files of this directory, like a top-down os.walk
+        for entry in subdirs:
+            yield from _scan(entry.path, rel_prefix + entry.name + '/')
+
+    exclude_name = os.path.basename(exclude_path) if exclude_path else None
+
+    for entry, relative_path in _scan(root_path, ''):
+        # --- 0. Never read the output file back in (compared by st_dev/st_ino, only on a name match) ---
+        if entry.name == exclude_name:
+            try:
+                if os.path.samefile(entry.path, exclude_path):
+                    continue
+            except OSError:
+                pass
 
+        filename = relative_path.rpartition('/')[2]
+        extension = get_extension(filename)
+        # Dotfiles like '.bashrc' have no language tag
+        lang = extension[1:] if len(extension) < len(filename) else ''
+
+        # --- 1. Priority 'Allow' Check (Overrides all ignores) ---
+        is_force_allowed = extension in allowed_extensions or \
+                           (allow_spec and allow_spec.match_file(relative_path))
+
+        if not is_force_allowed:  # Skip all other ignore checks if force-allowed
             # --- 2. 'allowed_dirs' Check (if specified) ---
-            if allowed_paths:
-                # Check if the file's path starts with any of the allowed directory paths
-                is_allowed = any(relative_path.startswith(p) for p in allowed_paths)
-                if not is_allowed:
-                    continue  # Skip if not in an allowed path
-
-            # --- 3. 'Ignored' Config Check ---
-            if filename in ignored_files or \
-                    relative_path in ignored_files or \
-                    (extension and extension in ignored_extensions):
+            if allowed_dirs_pattern and not allowed_dirs_pattern.match(relative_path):
+                continue  # Skip if not in an allowed path
+
+            # --- 3. 'Ignored' Config and '.gitignore' Check ---
+            if extension in ignored_extensions or \
+                    (ignored_names_pattern and ignored_names_pattern.match(filename)) or \
+                    (ignored_paths_pattern and ignored_paths_pattern.match(relative_path)) or \
+                    ignore_spec.match_file(relative_path):
                 continue
 
-            # --- 4. '.gitignore' Check ---
-            if spec and spec.match_file(relative_path):
+        # --- 4. Size Check (stat() is only issued for files that passed the name filters) ---
+        if max_file_size:
+            try:
+                file_size = entry.stat(follow_symlinks=follow_symlinks).st_size
+            except OSError as e:
+                logging.warning(f"Could not stat file {entry.path}: {e}")
+                continue
+            if snapshot is not None:
+                snapshot["sizes"].append((entry.path, relative_path, file_size))
+            if file_size > max_file_size:
+                logging.warning(f"Skipping large file ({file_size} bytes): {relative_path}")
                 continue
 
-            # --- 5. Add File ---
-            # If it passed all checks, add it
-            files_to_process.append(full_path)
+        # --- 5. Add File ---
+        # If it passed all checks, add it
+        if sort_by == "none":
+            yield entry.path, relative_path, lang
+        else:
+            files_to_process.append((entry, relative_path, lang))
+
+    if sort_by == "path":
+        files_to_process.sort(key=itemgetter(1))
+    elif sort_by == "inode":
+        # The inode number comes from the directory listing, so no extra stat() is needed on POSIX
+        files_to_process.sort(key=lambda item: item[0].inode())
+
+    for entry, relative_path, lang in files_to_process:
+        yield entry.path, relative_path, lang
+
+
+def get_cache_path(root_path: str) -> str:
+    """Returns the default discovery cache file for a project, inside the user cache directory."""
+    cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    project_hash = hashlib.sha256(root_path.encode('utf-8', errors='surrogateescape')).hexdigest()[:16]
+    return os.path.join(cache_dir, "llmcontext", f"{project_hash}.json")
+
+
+def discovery_cache_key(root_path: str, config: Dict[str, Any], sort_by: str,
+                        max_file_size: int, follow_symlinks: bool, exclude_path: Optional[str]) -> str:
+    """Fingerprints everything that affects discovery, so a cache built with other settings is never reused."""
+    settings = {
+        "version": CACHE_VERSION,
+        "root": root_path,
+        "lists": {name: sorted(config[name]) for name in (
+            "allowed_dirs", "allowed_files", "allowed_extensions",
+            "ignored_dirs", "ignored_files", "ignored_extensions",
+        )},
+        "gitignore": config["gitignore_lines"],
+        "sort_by": sort_by,
+        "max_file_size": max_file_size,
+        "follow_symlinks": follow_symlinks,
+        "exclude_path": exclude_path,
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8', errors='surrogateescape')).hexdigest()
 
-    return files_to_process
+
+def load_discovery_cache(cache_path: str, key: str, follow_symlinks: bool) -> Optional[Dict[str, list]]:
+    """
+    Returns the cache contents if they are still valid, otherwise None.
+
+    The cache is valid if it was built with the same settings ('key'), no scanned directory
+    changed its mtime (files were added, removed or renamed), and no size-checked file
+    changed its size.
+    """
+    try:
+        with open(cache_path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+            cache = json.load(f)
+        if cache.get("key") != key:
+            return None
+        for dirpath, mtime_ns in cache["dirs"]:
+            if os.stat(dirpath).st_mtime_ns != mtime_ns:
+                return None
+        for full_path, relative_path, file_size in cache["sizes"]:
+            if os.stat(full_path, follow_symlinks=follow_symlinks).st_size != file_size:
+                return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return cache
+
+
+def save_discovery_cache(cache_path: str, key: str, files: List[Tuple[str, str, str]],
+                         snapshot: Dict[str, list], scan_start_ns: int):
+    """Writes the discovery cache; failures are logged but never abort the run."""
+    # Directories changed right before or during the scan could change again without a new mtime
+    if any(mtime_ns >= scan_start_ns - CACHE_RACY_WINDOW_NS for _, mtime_ns in snapshot["dirs"]):
+        logging.info("Project changed too recently to cache the file list reliably. It will be cached on the next run.")
+        return
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8', errors='surrogateescape') as f:
+            json.dump({"key": key, "dirs": snapshot["dirs"], "sizes": snapshot["sizes"], "files": files}, f)
+    except OSError as e:
+        logging.warning(f"Could not write discovery cache {cache_path}: {e}")
+
+
+def discover_files_cached(root_path: str, config: Dict[str, Any], cache_path: str, sort_by: str = "none",
+                          max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+                          follow_symlinks: bool = False,
+                          exclude_path: Optional[str] = None) -> Iterator[Tuple[str, str, str]]:
+    """
+    Same as discover_files(), but reuses the file list from the previous run when nothing
+    relevant changed, and saves the result for the next run otherwise.
+    """
+    key = discovery_cache_key(root_path, config, sort_by, max_file_size, follow_symlinks, exclude_path)
+    cache = load_discovery_cache(cache_path, key, follow_symlinks)
+    if cache is not None:
+        logging.info(f"Using cached file list from: {cache_path}")
+        for full_path, relative_path, file_size in cache["sizes"]:
+            if file_size > max_file_size:
+                logging.warning(f"Skipping large file ({file_size} bytes): {relative_path}")
+        for full_path, relative_path, lang in cache["files"]:
+            yield full_path, relative_path, lang
+        return
+
+    snapshot = {"dirs": [], "sizes": []}
+    scan_start_ns = time.time_ns()
+    files = []
+    for file in discover_files(root_path, config, sort_by, max_file_size, follow_symlinks,
+                               exclude_path=exclude_path, snapshot=snapshot):
+        files.append(file)
+        yield file
+    save_discovery_cache(cache_path, key, files, snapshot, scan_start_ns)
+
+
+@functools.lru_cache(maxsize=128)
+def code_fence_opening(lang: str) -> bytes:
+    """Returns the encoded opening code fence for a language; there are only a handful per project."""
+    return f"```{lang}\n".encode('utf-8', errors='ignore')
+
+
+class BinaryFileError(Exception):
+    """Raised when a file looks binary or is not valid UTF-8."""
+
+
+def read_file(full_path: str) -> Tuple[Optional[bytes], Optional[Exception]]:
+    """
+    Reads a file's raw bytes. Runs in a worker thread, so errors are returned
+    as (None, error) instead of being raised.
+
+    Only the first BINARY_SNIFF_SIZE bytes are read until the file is known to be text,
+    so binary files are rejected without reading them in full. At most STREAM_THRESHOLD
+    bytes are returned; if that limit is reached, the rest must be copied with copy_file_tail().
+    """
+    try:
+        with open(full_path, 'rb') as content_handle:
+            head = content_handle.read(BINARY_SNIFF_SIZE)
+            if b'\x00' in head:
+                raise BinaryFileError(full_path)
+            # Most source files are pure ASCII, which bytes.isascii() confirms much faster than a UTF-8 decode.
+            # A multi-byte character may be cut at the end of a full sniff buffer, but not at the
+            # end of a shorter head, which is the whole file
+            if not head.isascii():
+                codecs.getincrementaldecoder('utf-8')().decode(head, final=len(head) < BINARY_SNIFF_SIZE)
+            if len(head) < BINARY_SNIFF_SIZE:
+                return head, None
+            return head + content_handle.read(STREAM_THRESHOLD - len(head)), None
+    except UnicodeDecodeError:
+        return None, BinaryFileError(full_path)
+    except Exception as e:
+        return None, e
+
+
+def copy_file_tail(src_path: str, out_file: BinaryIO, offset: int):
+    """
+    Appends the contents of 'src_path' from 'offset' up to its size at open time to 'out_file'.
+
+    Tries the in-kernel os.copy_file_range() (Linux), then the zero-copy os.sendfile(),
+    and finally falls back to plain reads and writes. A method that fails or stops early
+    (some virtual/FUSE filesystems return 0) hands over to the next one at the same offset.
+    Bytes appended while copying are not copied, so a growing file cannot make this loop forever.
+
+    Raises OSError if the file ends before its size at open time (e.g. it was truncated).
+    """
+    out_file.flush()
+    out_fd = out_file.fileno()
+    with open(src_path, 'rb') as src:
+        in_fd = src.fileno()
+        remaining = os.fstat(in_fd).st_size - offset
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(in_fd, out_fd, min(remaining, COPY_CHUNK_SIZE), offset)
+                    if not copied:
+                        break
+                    offset += copied
+                    remaining -= copied
+            except OSError:
+                # e.g. EXDEV across filesystems on older kernels, or unsupported filesystems
+                pass
+        if remaining > 0 and hasattr(os, 'sendfile'):
+            try:
+                while remaining > 0:
+                    sent = os.sendfile(out_fd, in_fd, offset, min(remaining, COPY_CHUNK_SIZE))
+                    if not sent:
+                        break
+                    offset += sent
+                    remaining -= sent
+            except OSError:
+                # e.g. platforms where sendfile() only accepts socket outputs
+                pass
+        if remaining > 0:
+            src.seek(offset)
+            while remaining > 0:
+                chunk = src.read(min(remaining, COPY_CHUNK_SIZE))
+                if not chunk:
+                    raise OSError(f"{src_path} ended {remaining} bytes early")
+                out_file.write(chunk)
+                remaining -= len(chunk)
+
+
+def read_files_in_order(files: Iterable[Tuple[str, str, str]], executor: ThreadPoolExecutor,
+                        window: int = READ_WORKERS * 4) -> Iterator[Tuple[Tuple[str, str, str], Tuple[Optional[bytes], Optional[Exception]]]]:
+    """
+    Reads files concurrently while preserving their order, yielding (file, read_file() result) pairs.
+    At most 'window' reads are in flight, so 'files' can be a lazy generator and memory stays bounded.
+    """
+    pending = deque()
+    for file in files:
+        pending.append((file, executor.submit(read_file, file[0])))
+        if len(pending) >= window:
+            file, future = pending.popleft()
+            yield file, future.result()
+    while pending:
+        file, future = pending.popleft()
+        yield file, future.result()
 
 
 def main():
@@ -272,36 +729,70 @@ def main():
         config = load_config(root_directory)
         project_name = os.path.basename(root_directory)
         output_file = args.output or f"{project_name}_context.md"
+        output_path = os.path.abspath(output_file)
 
         logging.info(f"Starting to process project: '{project_name}'")
-        gitignore_spec = load_gitignore_spec(root_directory)
 
-        files_to_process = discover_files(root_directory, config, gitignore_spec)
+        if args.no_cache:
+            files_to_process = discover_files(root_directory, config, args.sort, args.max_file_size,
+                                              args.follow_symlinks, exclude_path=output_path)
+        else:
+            cache_path = args.cache_path or get_cache_path(root_directory)
+            files_to_process = discover_files_cached(root_directory, config, cache_path, args.sort,
+                                                     args.max_file_size, args.follow_symlinks, output_path)
 
-        if not files_to_process:
+        # Peek at the first file so no output file is created for an empty project
+        first_file = next(files_to_process, None)
+        if first_file is None:
             logging.warning("No files found to process. Check your ignore/allow configuration.")
             return
 
-        with open(output_file, 'w', encoding='utf-8', errors='ignore') as f:
-            f.write(f"# Context for Project: {project_name}\n\n")
-            logging.info(f"Processing {len(files_to_process)} files...")
-
-            for full_path in tqdm(files_to_process, desc="Writing context file", unit="file"):
-                try:
-                    with open(full_path, 'r', encoding='utf-8', errors='ignore') as content_handle:
-                        content = content_handle.read()
+        with open(output_file, 'wb') as f, ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+            # Batch the output in memory and flush it in large chunks
+            buffer = bytearray(f"# Context for Project: {project_name}\n\n".encode('utf-8'))
+            logging.info("Processing files...")
 
-                    relative_path = os.path.relpath(full_path, root_directory).replace(os.path.sep, '/')
-                    _, extension = os.path.splitext(relative_path)
-                    lang = extension.lstrip('.')
+            # Discovery, reads and writes overlap; files are written in discovery order
+            results = read_files_in_order(itertools.chain([first_file], files_to_process), executor)
 
-                    f.write(f"## File: `{relative_path}`\n\n```{lang}\n{content}\n```\n\n---\n\n")
+            # Refresh the progress bar at most every 100 files / 0.5s to keep its overhead out of the loop
+            progress = tqdm(results, desc="Writing context file", unit="file", mininterval=0.5, miniters=100)
 
-                except UnicodeDecodeError:
+            for (full_path, relative_path, lang), (content, error) in progress:
+                try:
+                    if error is not None:
+                        raise error
+
+                    buffer += FILE_HEADER_PREFIX
+                    buffer += relative_path.encode('utf-8', errors='ignore')
+                    buffer += FILE_HEADER_SUFFIX
+                    buffer += code_fence_opening(lang)
+                    buffer += content
+
+                    if len(content) >= STREAM_THRESHOLD:
+                        # Large file: only the beginning was read, copy the rest directly
+                        f.write(buffer)
+                        buffer.clear()
+                        try:
+                            copy_file_tail(full_path, f, len(content))
+                        except Exception as e:
+                            # The header is already on disk, so close the code fence instead of bailing out
+                            logging.warning(f"Could not copy the rest of {relative_path}, output is truncated: {e}")
+                            buffer += TRUNCATED_MARKER
+
+                    buffer += FILE_FOOTER
+
+                    if len(buffer) >= OUTPUT_BUFFER_SIZE:
+                        f.write(buffer)
+                        buffer.clear()
+
+                except BinaryFileError:
                     logging.warning(f"Skipping binary or non-UTF-8 file: {relative_path}")
                 except Exception as e:
                     logging.warning(f"Could not read or process file {full_path}: {e}")
 
+            f.write(buffer)
+
         logging.info(f"✅ Successfully created context file: {output_file}")
 
     except Exception as e: